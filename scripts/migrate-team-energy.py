@@ -28,8 +28,15 @@ def migrate_teams(mongodb_url):
     )
 
     try:
-        # Connect to MongoDB
-        client = MongoClient(mongodb_url, serverSelectionTimeoutMS=5000)
+        # Connect to MongoDB with a pool sized for a single short-lived
+        # migration instead of the driver default of 100 sockets
+        client = MongoClient(
+            mongodb_url,
+            maxPoolSize=16,
+            minPoolSize=4,
+            waitQueueTimeoutMS=10000,
+            serverSelectionTimeoutMS=5000,
+        )
 
         # Test connection
         client.admin.command("ping")
@@ -53,12 +60,23 @@ def migrate_teams(mongodb_url):
             ]
         }
 
-        teams_to_migrate = list(teams_collection.find(query))
-
-        if not teams_to_migrate:
+        # Cheap existence check first so an already-migrated database
+        # doesn't pull every matching team document over the wire
+        if teams_collection.count_documents(query, limit=1) == 0:
             print("✅ No teams need migration. All teams have energy values!")
             return 0
 
+        teams_to_migrate = list(
+            teams_collection.find(
+                query,
+                projection={
+                    "teamName": 1,
+                    "role.baseEnergy": 1,
+                    "role.levelEnergy": 1,
+                },
+            )
+        )
+
         print(f"📊 Found {len(teams_to_migrate)} team(s) that need migration:\n")
 
         for team in teams_to_migrate:
@@ -19,7 +19,7 @@ import os
 
 def check_and_install_dependencies():
     """Check for required dependencies and install if missing"""
-    required_packages = ['websockets']
+    required_packages = ['websockets', 'numpy']
     missing_packages = []
     
     for package in required_packages:
@@ -40,7 +40,7 @@ def check_and_install_dependencies():
             print("Dependencies installed successfully!")
         except subprocess.CalledProcessError as e:
             print(f"Failed to install dependencies: {e}")
-            print("Please install manually: pip install websockets")
+            print(f"Please install manually: pip install {' '.join(missing_packages)}")
             return False
     
     return True
@@ -11,9 +11,11 @@ import argparse
 import json
 import os
 from datetime import datetime
+from functools import lru_cache
+from types import MappingProxyType
 
 try:
-    from pymongo import MongoClient
+    from pymongo import MongoClient, UpdateOne
     PYMONGO_AVAILABLE = True
 except ImportError:
     PYMONGO_AVAILABLE = False
@@ -21,10 +23,41 @@ except ImportError:
     print("   Install with: pip install pymongo")
     print("   Preview mode still available")
     MongoClient = None
+    UpdateOne = None
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Spread applied around the base price
+BID_MULT = 0.98    # 2% below base price
+ASK_MULT = 1.02    # 2% above base price
+OFFER_MULT = 1.10  # Offer generator premium above mid
+
+# Fixed shape of a market_state document; copied per product so every
+# document starts from a pre-sized dict with the keys already in place
+_MARKET_STATE_TEMPLATE = {
+    "product": None,
+    "bestBid": 0.0,
+    "bestAsk": 0.0,
+    "mid": 0.0,
+    "lastTradePrice": 0.0,
+    "volume24h": 0,
+    "lastUpdated": None,
+    "description": None,
+    "initialBasePrice": 0.0
+}
+
+@lru_cache(maxsize=1)
 def get_initial_prices():
-    """Define initial base prices for all products."""
-    return {
+    """Define initial base prices for all products.
+
+    The result is cached and read-only, including each product's entry, so
+    every caller shares one copy.
+    """
+    prices = {
         # Basic Avocado Products
         "FOSFO": {
             "base_price": 12.50,
@@ -65,19 +98,40 @@ def get_initial_prices():
             "description": "Graviton Particles - Quantum avocado energy particles"
         }
     }
+    return MappingProxyType({
+        product: MappingProxyType(data) for product, data in prices.items()
+    })
+
+def prices_to_dict(prices):
+    """Copy the read-only price mapping into plain dicts for JSON/BSON encoding."""
+    return {product: dict(data) for product, data in prices.items()}
+
+# Shared client so repeated connect_to_mongodb calls reuse one warm pool
+_client = None
 
 def connect_to_mongodb(uri, database_name):
     """Connect to MongoDB and return the database."""
+    global _client
+    
     if not PYMONGO_AVAILABLE:
         print("❌ pymongo not available - cannot connect to database")
         return None
         
     try:
-        client = MongoClient(uri)
-        db = client[database_name]
+        if _client is None:
+            _client = MongoClient(
+                uri,
+                maxPoolSize=50,
+                minPoolSize=5,
+                serverSelectionTimeoutMS=3000,
+                retryWrites=True,
+                w="majority",
+                appname="set-initial-prices"
+            )
+        db = _client[database_name]
         
         # Test connection
-        db.admin.command('ping')
+        _client.admin.command('ping')
         print(f"✅ Connected to MongoDB: {database_name}")
         return db
     except Exception as e:
@@ -88,39 +142,40 @@ def set_market_state_prices(db, prices):
     """Set initial prices in the market_state collection."""
     market_state_collection = db.market_state
     
-    updated_count = 0
-    created_count = 0
+    # Same unique index the server creates on startup; this is a no-op when it
+    # already exists and keeps the upserts below from scanning or duplicating
+    market_state_collection.create_index([("product", 1)], unique=True, name="product_1")
+    
+    now = datetime.utcnow()
+    ops = []
     
     for product, data in prices.items():
         base_price = data["base_price"]
-        description = data["description"]
         
         # Create market state document
-        market_state = {
-            "product": product,
-            "bestBid": base_price * 0.98,  # 2% below base price
-            "bestAsk": base_price * 1.02,  # 2% above base price  
-            "mid": base_price,
-            "lastTradePrice": base_price,
-            "volume24h": 0,
-            "lastUpdated": datetime.utcnow(),
-            "description": description,
-            "initialBasePrice": base_price
-        }
+        market_state = _MARKET_STATE_TEMPLATE.copy()
+        market_state["product"] = product
+        market_state["bestBid"] = base_price * BID_MULT
+        market_state["bestAsk"] = base_price * ASK_MULT
+        market_state["mid"] = base_price
+        market_state["lastTradePrice"] = base_price
+        market_state["lastUpdated"] = now
+        market_state["description"] = data["description"]
+        market_state["initialBasePrice"] = base_price
         
-        # Upsert the document
-        result = market_state_collection.update_one(
+        ops.append(UpdateOne(
             {"product": product},
             {"$set": market_state},
-            upsert=True
-        )
-        
-        if result.upserted_id:
-            created_count += 1
-            print(f"✅ Created market state for {product}: ${base_price:.2f}")
-        else:
-            updated_count += 1
-            print(f"🔄 Updated market state for {product}: ${base_price:.2f}")
+            upsert=True,
+            hint="product_1"
+        ))
+    
+    # Send every upsert in a single batched command
+    result = market_state_collection.bulk_write(ops, ordered=False)
+    created_count = result.upserted_count
+    updated_count = result.matched_count
+    
+    print(f"✅ Market state upserted: {created_count} created, {updated_count} updated")
     
     return created_count, updated_count
 
@@ -131,7 +186,7 @@ def create_price_reference_document(db, prices):
         "created_at": datetime.utcnow(),
         "version": "1.0",
         "description": "Initial base prices for Intergalactic Avocado Stock Exchange",
-        "prices": prices,
+        "prices": prices_to_dict(prices),
         "pricing_notes": [
             "Prices are set to encourage trading activity",
             "Market forces will adjust prices through bid/ask spreads",
@@ -162,9 +217,9 @@ def validate_pricing_logic(prices):
     
     for product, data in sorted_products:
         base = data["base_price"]
-        bid = base * 0.98
-        ask = base * 1.02
-        offer_price = base * 1.10
+        bid = base * BID_MULT
+        ask = base * ASK_MULT
+        offer_price = base * OFFER_MULT
         
         print(f"{product:<12} | Base: ${base:>6.2f} | Bid: ${bid:>6.2f} | Ask: ${ask:>6.2f} | Offer: ${offer_price:>6.2f}")
     
@@ -180,11 +235,16 @@ def export_prices_json(prices, filename):
     export_data = {
         "exported_at": datetime.now().isoformat(),
         "description": "Initial base prices for Intergalactic Avocado Stock Exchange",
-        "prices": prices
+        "prices": prices_to_dict(prices)
     }
     
-    with open(filename, 'w') as f:
-        json.dump(export_data, f, indent=2)
+    # orjson encodes in C straight to bytes; stdlib json is the fallback
+    if ORJSON_AVAILABLE:
+        with open(filename, 'wb') as f:
+            f.write(orjson.dumps(export_data, option=orjson.OPT_INDENT_2))
+    else:
+        with open(filename, 'w') as f:
+            json.dump(export_data, f, indent=2)
     
     print(f"📄 Prices exported to: {filename}")
 
@@ -250,7 +310,7 @@ Examples:
     print(f"Database: {args.database}")
     
     db = connect_to_mongodb(args.mongodb_uri, args.database)
-    if not db:
+    if db is None:
         return
     
     # Set prices in database
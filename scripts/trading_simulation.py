@@ -22,35 +22,168 @@ Usage:
 
 import asyncio
 import json
-import random
-import time
 import logging
+import logging.handlers
 import argparse
+import atexit
+import math
+import queue
+import ssl
 import sys
+import uuid
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import Callable, List, Dict, Any, Optional
 from dataclasses import dataclass, field
-import statistics
 
-# Import websockets with fallback
-websockets = None
+# websockets is required; exit early with install instructions if missing
 try:
     import websockets
 except ImportError:
     print("websockets library not found. Install with: pip install websockets")
     sys.exit(1)
 
-# Configure logging
+try:
+    import numpy as np
+except ImportError:
+    print("numpy library not found. Install with: pip install numpy")
+    sys.exit(1)
+
+# Prefer orjson's C encoder/decoder on the message path, stdlib json otherwise
+try:
+    import orjson
+
+    def _dumps(obj: Any) -> str:
+        # The server ignores binary frames, so payloads must stay text
+        return orjson.dumps(obj).decode()
+
+    _loads = orjson.loads
+except ImportError:
+    _dumps = json.dumps
+    _loads = json.loads
+
+# Configure logging. Records are handed to a queue and written by a
+# background listener thread so the event loop never blocks on file I/O.
+_log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+_log_handlers = [
+    logging.FileHandler(f'trading_simulation_{datetime.now().strftime("%Y%m%d_%H%M%S")}.log'),
+    logging.StreamHandler(sys.stdout)
+]
+for _handler in _log_handlers:
+    _handler.setFormatter(_log_formatter)
+
+log_queue = queue.SimpleQueue()
+log_listener = logging.handlers.QueueListener(log_queue, *_log_handlers)
+log_listener.start()
+atexit.register(log_listener.stop)
+
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(f'trading_simulation_{datetime.now().strftime("%Y%m%d_%H%M%S")}.log'),
-        logging.StreamHandler(sys.stdout)
-    ]
+    format='%(message)s',
+    handlers=[logging.handlers.QueueHandler(log_queue)]
 )
+# The format never shows caller, thread, process or task fields; skip
+# collecting them for every record (see the logging HOWTO's Optimization notes)
+logging._srcfile = None
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
+logging.logAsyncioTasks = False
 logger = logging.getLogger(__name__)
 
+# Number of samples drawn per batch each time a RandomPool buffer runs out
+PRICE_BUFFER_SIZE = 4096
+
+# Fixed product set; per-product arrays are indexed by position in PRODUCTS
+PRODUCTS = ('FOSFO', 'PITA', 'PALTA-OIL', 'GUACA', 'SEBO', 'H-GUACA')
+PRODUCT_IDX = {name: i for i, name in enumerate(PRODUCTS)}
+INITIAL_INVENTORY = np.array([50, 30, 20, 15, 40, 10], dtype=np.int32)
+MIN_PRICES = np.array([8.0, 12.0, 20.0, 28.0, 5.0, 40.0])
+MAX_PRICES = np.array([15.0, 22.0, 35.0, 45.0, 12.0, 60.0])
+
+# The server encodes "type" first with no whitespace, so tickers are
+# recognisable from their first bytes
+TICKER_PREFIX = '{"type":"TICKER"'
+
+# Replies to our requests that the server may send without echoing clOrdID;
+# they answer the oldest pending request. Any other frame without a
+# clOrdID is a server push and never completes a request.
+ID_LESS_REPLY_TYPES = frozenset({"ERROR", "ECHO"})
+
+# One TLS context shared by every wss:// client so CA certificates are loaded once
+_ssl_context = None
+
+def get_ssl_context() -> ssl.SSLContext:
+    """Return the shared client TLS context, creating it on first use"""
+    global _ssl_context
+    if _ssl_context is None:
+        _ssl_context = ssl.create_default_context()
+    return _ssl_context
+
+def log_task_failure(task: asyncio.Task):
+    """Done-callback that reports a task's unhandled exception instead of dropping it"""
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Task {task.get_name()} failed: {task.exception()!r}")
+
+def create_named_task(loop: asyncio.AbstractEventLoop, coro, name: str) -> asyncio.Task:
+    """Create a named task on loop whose failure is always logged"""
+    task = loop.create_task(coro, name=name)
+    task.add_done_callback(log_task_failure)
+    return task
+
+def compute_prices(base_prices: np.ndarray, market_trends: np.ndarray,
+                   volatility: np.ndarray, adjustments: np.ndarray) -> np.ndarray:
+    """Vectorized order pricing: trend and volatility, rounded to cents, then adjustment"""
+    return np.round(base_prices * (1.0 + market_trends * 0.1) * volatility, 2) * adjustments
+
+class RandomPool:
+    """Pre-drawn random batches shared by every client of a simulation.
+    
+    Clients all run on one event loop, so a single generator and one set of
+    cursors can serve them all instead of duplicating the buffers per client.
+    """
+    
+    __slots__ = ('rng', 'price_buffers', 'price_cursors', 'uniforms', 'uniform_cursor')
+    
+    def __init__(self):
+        self.rng = np.random.default_rng()
+        # base*volatility prices per product, consumed by cursor
+        self.price_buffers: List[List[float]] = [[] for _ in PRODUCTS]
+        self.price_cursors: List[int] = [PRICE_BUFFER_SIZE] * len(PRODUCTS)
+        # U(0, 1) samples for the per-iteration phase loops
+        self.uniforms: List[float] = []
+        self.uniform_cursor = PRICE_BUFFER_SIZE
+    
+    def refill_price_buffer(self, product_index: int):
+        """Draw a batch of base prices with volatility applied in one vectorized pass"""
+        base_prices = self.rng.uniform(
+            MIN_PRICES[product_index], MAX_PRICES[product_index], PRICE_BUFFER_SIZE
+        )
+        volatility = self.rng.uniform(0.95, 1.05, PRICE_BUFFER_SIZE)
+        
+        # Plain floats index much faster than numpy scalars
+        self.price_buffers[product_index] = (base_prices * volatility).tolist()
+        self.price_cursors[product_index] = 0
+    
+    def next_price(self, product_index: int) -> float:
+        """Next pre-drawn base*volatility price for PRODUCTS[product_index]"""
+        cursor = self.price_cursors[product_index]
+        if cursor >= PRICE_BUFFER_SIZE:
+            self.refill_price_buffer(product_index)
+            cursor = 0
+        self.price_cursors[product_index] = cursor + 1
+        return self.price_buffers[product_index][cursor]
+    
+    def next_uniform(self, low: float = 0.0, high: float = 1.0) -> float:
+        """Next pre-drawn sample scaled to [low, high), refilling the batch when used up"""
+        cursor = self.uniform_cursor
+        if cursor >= PRICE_BUFFER_SIZE:
+            self.uniforms = self.rng.random(PRICE_BUFFER_SIZE).tolist()
+            cursor = 0
+        self.uniform_cursor = cursor + 1
+        
+        return low + (high - low) * self.uniforms[cursor]
+
 @dataclass
 class OrderStats:
     """Statistics for order execution"""
@@ -59,17 +192,27 @@ class OrderStats:
     failed_orders: int = 0
     avg_response_time: float = 0.0
     first_fills: int = 0
-    order_times: List[float] = field(default_factory=list)
+    response_count: int = 0
+    response_time_sum: float = 0.0
+    min_response_time: float = math.inf
+    max_response_time: float = 0.0
+    
+    def record_response_time(self, response_time: float):
+        """Fold one response time into the running aggregates"""
+        self.response_count += 1
+        self.response_time_sum += response_time
+        if response_time < self.min_response_time:
+            self.min_response_time = response_time
+        if response_time > self.max_response_time:
+            self.max_response_time = response_time
+        self.avg_response_time = self.response_time_sum / self.response_count
 
 @dataclass
 class ClientState:
     """State tracking for each trading client"""
     token: str
     balance: float = 10000.0
-    inventory: Dict[str, int] = field(default_factory=lambda: {
-        'FOSFO': 50, 'PITA': 30, 'PALTA-OIL': 20,
-        'GUACA': 15, 'SEBO': 40, 'H-GUACA': 10
-    })
+    inventory: np.ndarray = field(default_factory=INITIAL_INVENTORY.copy)
     orders_placed: int = 0
     orders_filled: int = 0
     production_count: int = 0
@@ -81,30 +224,56 @@ class ClientState:
 class TradingClient:
     """Individual trading client with WebSocket connection"""
     
-    PRODUCTS = ['FOSFO', 'PITA', 'PALTA-OIL', 'GUACA', 'SEBO', 'H-GUACA']
-    PRICE_RANGES = {
-        'FOSFO': (8.0, 15.0),
-        'PITA': (12.0, 22.0),
-        'PALTA-OIL': (20.0, 35.0),
-        'GUACA': (28.0, 45.0),
-        'SEBO': (5.0, 12.0),
-        'H-GUACA': (40.0, 60.0)
-    }
-    
-    def __init__(self, token: str, server_url: str = "ws://localhost:8080"):
+    __slots__ = (
+        'token', 'server_url', 'state', 'websocket', 'running', 'send_queue',
+        'pending', 'io_tasks', 'logger', 'random_pool', 'rng', 'order_message',
+    )
+    
+    # Parallel per-product arrays, indexed by product position
+    PRODUCTS = PRODUCTS
+    MIN_PRICES = MIN_PRICES
+    MAX_PRICES = MAX_PRICES
+    
+    # Burst session action mix and the shortest pause between actions
+    ACTIONS = ('buy', 'sell', 'production', 'wait')
+    ACTION_WEIGHTS = (0.30, 0.30, 0.20, 0.20)
+    MIN_ACTION_DELAY = 0.5
+    
+    def __init__(self, token: str, server_url: str = "ws://localhost:8080",
+                 random_pool: Optional[RandomPool] = None):
         self.token = token
         self.server_url = server_url
         self.state = ClientState(token=token)
         self.websocket = None
         self.running = False
-        self.message_queue = asyncio.Queue()
+        self.send_queue = asyncio.Queue()
+        # In-flight requests keyed by clOrdID, oldest first
+        self.pending: "OrderedDict[str, asyncio.Future]" = OrderedDict()
+        self.io_tasks: List[asyncio.Task] = []
         self.logger = logging.getLogger(f"Client-{token}")
+        self.order_message = f"Simulation order from {token}"
+        
+        # Random batches, normally shared with the other clients of the simulation
+        self.random_pool = random_pool if random_pool is not None else RandomPool()
+        self.rng = self.random_pool.rng
         
     async def connect(self) -> bool:
         """Connect to the trading server"""
         try:
             self.logger.info(f"Connecting to {self.server_url}")
-            self.websocket = await websockets.connect(self.server_url)
+            # Frames are small JSON; per-message deflate only costs CPU here
+            connect_options = {}
+            if self.server_url.startswith("wss://"):
+                connect_options["ssl"] = get_ssl_context()
+            
+            self.websocket = await websockets.connect(
+                self.server_url,
+                compression=None,
+                ping_interval=20,
+                ping_timeout=20,
+                max_queue=64,
+                **connect_options,
+            )
             self.state.connection_time = datetime.now()
             
             # Authenticate
@@ -112,15 +281,22 @@ class TradingClient:
                 "type": "LOGIN",
                 "token": self.token
             }
-            await self.websocket.send(json.dumps(auth_message))
+            await self.websocket.send(_dumps(auth_message))
             
             # Wait for authentication response
             response = await asyncio.wait_for(self.websocket.recv(), timeout=5.0)
-            auth_response = json.loads(response)
+            auth_response = _loads(response)
             
             if auth_response.get("type") == "LOGIN_OK":
                 self.state.is_connected = True
                 self.logger.info(f"Successfully authenticated with token {self.token}")
+                
+                # One reader and one writer per connection for the whole session
+                loop = asyncio.get_running_loop()
+                self.io_tasks = [
+                    create_named_task(loop, self.listen_for_messages(), f"reader-{self.token}"),
+                    create_named_task(loop, self.send_loop(), f"writer-{self.token}"),
+                ]
                 return True
             else:
                 self.logger.error(f"Authentication failed: {auth_response}")
@@ -133,40 +309,109 @@ class TradingClient:
     async def disconnect(self):
         """Disconnect from the server"""
         self.running = False
+        for task in self.io_tasks:
+            task.cancel()
+        await asyncio.gather(*self.io_tasks, return_exceptions=True)
+        self.io_tasks = []
+        
         if self.websocket:
             await self.websocket.close()
             self.state.is_connected = False
             self.logger.info("Disconnected from server")
     
-    async def send_message(self, message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Send message to server and measure response time"""
+    def submit_message(self, message: Dict[str, Any],
+                       on_response: Callable[[Optional[Dict[str, Any]]], None]) -> bool:
+        """Queue message for the sender task without waiting for its response.
+        
+        on_response is called from the reader task with the response, or with
+        None on timeout or disconnect, so any number of requests can be in
+        flight at once. Returns False if the client is not connected.
+        """
         if not self.websocket:
-            return None
-            
-        try:
-            start_time = time.time()
-            await self.websocket.send(json.dumps(message))
-            
-            # Wait for response with timeout
-            response_raw = await asyncio.wait_for(self.websocket.recv(), timeout=10.0)
-            response_time = time.time() - start_time
-            
-            response = json.loads(response_raw)
-            self.state.stats.order_times.append(response_time)
+            return False
+        
+        request_id = message.setdefault("clOrdID", uuid.uuid4().hex)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending[request_id] = future
+        # One timer per request instead of wait_for's wrapper task
+        timeout_handle = loop.call_later(10.0, self.expire_request, future)
+        start_time = loop.time()
+        
+        def complete(done: asyncio.Future):
+            timeout_handle.cancel()
+            self.pending.pop(request_id, None)
             
-            self.logger.debug(f"Message sent: {message['type']}, Response time: {response_time:.3f}s")
-            return response
+            response = None
+            if done.cancelled():
+                pass
+            elif done.exception() is not None:
+                self.logger.warning(f"Timeout waiting for response to {message['type']}")
+            else:
+                response = done.result()
+                if response is not None:
+                    response_time = loop.time() - start_time
+                    self.state.stats.record_response_time(response_time)
+                    self.logger.debug("Message sent: %s, Response time: %.3fs", message['type'], response_time)
             
-        except asyncio.TimeoutError:
-            self.logger.warning(f"Timeout waiting for response to {message['type']}")
-            return None
-        except Exception as e:
-            self.logger.error(f"Error sending message: {e}")
+            on_response(response)
+        
+        future.add_done_callback(complete)
+        self.send_queue.put_nowait(message)
+        return True
+    
+    async def send_message(self, message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Queue message and wait for its response (None on timeout or disconnect)"""
+        reply = asyncio.get_running_loop().create_future()
+        
+        def deliver(response: Optional[Dict[str, Any]]):
+            # The waiter may have been cancelled in the meantime
+            if not reply.done():
+                reply.set_result(response)
+        
+        if not self.submit_message(message, deliver):
             return None
+        return await reply
     
-    async def place_order(self, side: str, product: str, quantity: int, 
-                         price: float, mode: str = "LIMIT") -> bool:
-        """Place a buy or sell order"""
+    @staticmethod
+    def expire_request(future: asyncio.Future):
+        """Fail a request whose response did not arrive in time"""
+        if not future.done():
+            future.set_exception(asyncio.TimeoutError())
+    
+    async def send_loop(self):
+        """Write queued messages back-to-back without waiting for responses"""
+        while self.websocket:
+            message = await self.send_queue.get()
+            try:
+                await self.websocket.send(_dumps(message))
+            except Exception as e:
+                self.logger.error(f"Error sending message: {e}")
+                self.resolve_response(message["clOrdID"], None)
+    
+    def resolve_response(self, request_id: Optional[str], response: Optional[Dict[str, Any]]):
+        """Complete the pending request a response belongs to"""
+        if request_id is None:
+            # Id-less reply (see ID_LESS_REPLY_TYPES); answer the oldest request
+            if not self.pending:
+                return
+            _, future = self.pending.popitem(last=False)
+        else:
+            future = self.pending.pop(request_id, None)
+            if future is None:
+                # Late reply to a request that already timed out
+                self.logger.debug("Dropping reply for unknown request %s", request_id)
+                return
+        
+        if future is not None and not future.done():
+            future.set_result(response)
+    
+    def place_order(self, side: str, product: str, quantity: int, 
+                    price: float, mode: str = "LIMIT") -> bool:
+        """Queue a buy or sell order; its result is booked when the response arrives.
+        
+        Returns whether the order was queued.
+        """
         order_message = {
             "type": "ORDER",
             "data": {
@@ -175,25 +420,30 @@ class TradingClient:
                 "quantity": quantity,
                 "price": round(price, 2),
                 "mode": mode,
-                "message": f"Simulation order from {self.token}"
+                "message": self.order_message
             }
         }
         
-        response = await self.send_message(order_message)
-        self.state.stats.total_orders += 1
+        def on_response(response: Optional[Dict[str, Any]]):
+            if response and response.get("type") == "ORDER_SUCCESS":
+                self.state.stats.successful_orders += 1
+                self.state.orders_placed += 1
+                self.logger.debug("Order placed: %s %s %s @ $%s", side, quantity, product, price)
+            else:
+                self.state.stats.failed_orders += 1
+                self.logger.warning(f"Order failed: {response}")
         
-        if response and response.get("type") == "ORDER_SUCCESS":
-            self.state.stats.successful_orders += 1
-            self.state.orders_placed += 1
-            self.logger.info(f"Order placed: {side} {quantity} {product} @ ${price}")
-            return True
-        else:
-            self.state.stats.failed_orders += 1
-            self.logger.warning(f"Order failed: {response}")
+        self.state.stats.total_orders += 1
+        if not self.submit_message(order_message, on_response):
+            on_response(None)
             return False
+        return True
     
-    async def simulate_production(self, product: str, quantity: int) -> bool:
-        """Simulate production of a product"""
+    def simulate_production(self, product: str, quantity: int) -> bool:
+        """Queue production of a product; inventory is updated when the response arrives.
+        
+        Returns whether the request was queued.
+        """
         production_message = {
             "type": "PRODUCTION",
             "data": {
@@ -202,77 +452,84 @@ class TradingClient:
             }
         }
         
-        response = await self.send_message(production_message)
-        
-        if response and response.get("type") == "PRODUCTION_SUCCESS":
-            self.state.production_count += 1
-            self.state.last_production = datetime.now()
-            self.logger.info(f"Production completed: {quantity} {product}")
-            
-            # Update inventory
-            if product in self.state.inventory:
-                self.state.inventory[product] += quantity
+        def on_response(response: Optional[Dict[str, Any]]):
+            if response and response.get("type") == "PRODUCTION_SUCCESS":
+                self.state.production_count += 1
+                self.state.last_production = datetime.now()
+                self.logger.debug("Production completed: %s %s", quantity, product)
+                
+                # Update inventory
+                self.state.inventory[PRODUCT_IDX[product]] += quantity
             else:
-                self.state.inventory[product] = quantity
-            return True
-        else:
-            self.logger.warning(f"Production failed: {response}")
+                self.logger.warning(f"Production failed: {response}")
+        
+        if not self.submit_message(production_message, on_response):
+            on_response(None)
             return False
+        return True
     
-    def generate_realistic_price(self, product: str, market_trend: float = 0.0) -> float:
-        """Generate realistic price based on product and market conditions"""
-        min_price, max_price = self.PRICE_RANGES[product]
-        base_price = random.uniform(min_price, max_price)
-        
+    def generate_realistic_price(self, product_index: int, market_trend: float = 0.0) -> float:
+        """Generate realistic price for the product at PRODUCTS[product_index]"""
         # Apply market trend
         trend_factor = 1.0 + (market_trend * 0.1)
         
-        # Add some randomness
-        volatility = random.uniform(0.95, 1.05)
-        
-        return round(base_price * trend_factor * volatility, 2)
+        return round(self.random_pool.next_price(product_index) * trend_factor, 2)
+    
+    def next_uniform(self, low: float = 0.0, high: float = 1.0) -> float:
+        """Next pre-drawn sample scaled to [low, high) from the shared pool"""
+        return self.random_pool.next_uniform(low, high)
     
-    async def burst_trading_session(self, duration_minutes: int = 5):
-        """Perform burst trading for specified duration"""
-        end_time = datetime.now() + timedelta(minutes=duration_minutes)
+    async def burst_trading_session(self, duration_minutes: int = 5, deadline: Optional[float] = None):
+        """Perform burst trading for specified duration, or until a shared loop-time deadline"""
+        loop = asyncio.get_running_loop()
+        if deadline is None:
+            deadline = loop.time() + duration_minutes * 60
         burst_count = 0
         
+        # Draw the whole session's randomness up front. Every iteration sleeps
+        # at least MIN_ACTION_DELAY, which bounds the number of steps.
+        steps = int(duration_minutes * 60 / self.MIN_ACTION_DELAY) + 1
+        actions = self.rng.choice(len(self.ACTIONS), size=steps, p=self.ACTION_WEIGHTS).tolist()
+        production_products = self.rng.integers(0, 3, steps).tolist()  # Focus on basic products
+        production_quantities = self.rng.integers(5, 21, steps).tolist()
+        trade_products = self.rng.integers(0, len(self.PRODUCTS), steps)
+        trade_quantities = self.rng.integers(1, 11, steps).tolist()
+        delays = self.rng.uniform(self.MIN_ACTION_DELAY, 3.0, steps).tolist()
+        
+        # Price every potential order in one pass instead of per iteration
+        trade_prices = compute_prices(
+            self.rng.uniform(self.MIN_PRICES[trade_products], self.MAX_PRICES[trade_products]),
+            self.rng.uniform(-0.5, 0.5, steps),   # Market trend simulation
+            self.rng.uniform(0.95, 1.05, steps),  # Volatility
+            self.rng.uniform(0.98, 1.02, steps),  # Slightly competitive buy/sell
+        ).tolist()
+        trade_products = trade_products.tolist()
+        step = 0
+        
         self.logger.info(f"Starting {duration_minutes}-minute burst trading session")
         
-        while datetime.now() < end_time and self.running:
+        while loop.time() < deadline and self.running:
+            i = step % steps
+            step += 1
+            
             try:
-                # Random action selection
-                action = random.choices(
-                    ['buy', 'sell', 'production', 'wait'],
-                    weights=[30, 30, 20, 20]
-                )[0]
+                action = self.ACTIONS[actions[i]]
                 
                 if action == 'production':
                     # Burst production
-                    product = random.choice(self.PRODUCTS[:3])  # Focus on basic products
-                    quantity = random.randint(5, 20)
-                    await self.simulate_production(product, quantity)
+                    product = self.PRODUCTS[production_products[i]]
+                    self.simulate_production(product, production_quantities[i])
                     
                 elif action in ['buy', 'sell']:
                     # Generate realistic trading
-                    product = random.choice(self.PRODUCTS)
-                    quantity = random.randint(1, 10)
-                    
-                    # Market trend simulation
-                    market_trend = random.uniform(-0.5, 0.5)
-                    price = self.generate_realistic_price(product, market_trend)
-                    
-                    # Slight price adjustment for competitive orders
-                    if action == 'buy':
-                        price *= random.uniform(0.98, 1.02)  # Slightly competitive buy
-                    else:
-                        price *= random.uniform(0.98, 1.02)  # Slightly competitive sell
-                    
-                    await self.place_order(action.upper(), product, quantity, price)
+                    product = self.PRODUCTS[trade_products[i]]
+                    self.place_order(
+                        action.upper(), product, trade_quantities[i], trade_prices[i]
+                    )
                     burst_count += 1
                 
                 # Variable delay for realistic simulation
-                await asyncio.sleep(random.uniform(0.5, 3.0))
+                await asyncio.sleep(delays[i])
                 
             except Exception as e:
                 self.logger.error(f"Error in burst session: {e}")
@@ -281,27 +538,46 @@ class TradingClient:
         self.logger.info(f"Burst trading session completed. Actions performed: {burst_count}")
     
     async def listen_for_messages(self):
-        """Listen for incoming messages from server"""
-        while self.running and self.websocket:
-            try:
-                message = await asyncio.wait_for(self.websocket.recv(), timeout=1.0)
-                data = json.loads(message)
+        """Listen for incoming messages and route responses to pending requests
+
+        Runs until the connection closes or the task is cancelled by disconnect().
+        """
+        try:
+            async for message in self.websocket:
+                # Tickers are only logged at DEBUG; don't parse them otherwise
+                if message.startswith(TICKER_PREFIX) and not self.logger.isEnabledFor(logging.DEBUG):
+                    continue
+                
+                data = _loads(message)
+                msg_type = data.get("type")
                 
                 # Handle different message types
-                if data.get("type") == "FILL":
+                if msg_type == "FILL":
                     self.state.orders_filled += 1
                     self.state.stats.first_fills += 1
-                    self.logger.info(f"Order filled: {data}")
-                elif data.get("type") == "TICKER":
-                    self.logger.debug(f"Market update: {data}")
-                elif data.get("type") == "ERROR":
-                    self.logger.warning(f"Server error: {data}")
+                    self.logger.debug("Order filled: %s", data)
+                elif msg_type == "TICKER":
+                    self.logger.debug("Market update: %s", data)
+                else:
+                    if msg_type == "ERROR":
+                        self.logger.warning(f"Server error: {data}")
                     
-            except asyncio.TimeoutError:
-                continue
-            except Exception as e:
-                self.logger.error(f"Error listening for messages: {e}")
-                break
+                    request_id = data.get("clOrdID")
+                    if request_id:
+                        self.resolve_response(request_id, data)
+                    elif msg_type in ID_LESS_REPLY_TYPES:
+                        self.resolve_response(None, data)
+                    else:
+                        # Server push (inventory, balance, order book, offers...)
+                        self.logger.debug("Server push: %s", data)
+                    
+        except Exception as e:
+            self.logger.error(f"Error listening for messages: {e}")
+        finally:
+            # Nobody is left to answer outstanding requests
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_result(None)
 
 class TradingSimulation:
     """Main simulation coordinator"""
@@ -310,6 +586,8 @@ class TradingSimulation:
         self.tokens = tokens
         self.server_url = server_url
         self.clients: List[TradingClient] = []
+        # One set of pre-drawn random batches for all clients
+        self.random_pool = RandomPool()
         self.start_time = None
         self.end_time = None
         self.logger = logging.getLogger("Simulation")
@@ -318,15 +596,18 @@ class TradingSimulation:
         """Initialize and connect all clients"""
         self.logger.info(f"Initializing {len(self.tokens)} trading clients")
         
-        for token in self.tokens:
-            client = TradingClient(token, self.server_url)
-            success = await client.connect()
-            
-            if success:
+        # Run all handshakes concurrently so startup costs ~1 RTT, not N
+        candidates = [TradingClient(token, self.server_url, self.random_pool) for token in self.tokens]
+        results = await asyncio.gather(
+            *(client.connect() for client in candidates), return_exceptions=True
+        )
+        
+        for client, success in zip(candidates, results):
+            if success is True:
                 self.clients.append(client)
-                self.logger.info(f"Client {token} connected successfully")
+                self.logger.info(f"Client {client.token} connected successfully")
             else:
-                self.logger.error(f"Failed to connect client {token}")
+                self.logger.error(f"Failed to connect client {client.token}")
         
         connected_count = len(self.clients)
         self.logger.info(f"Successfully connected {connected_count}/{len(self.tokens)} clients")
@@ -364,36 +645,33 @@ class TradingSimulation:
     
     async def run_burst_production_phase(self, duration_minutes: int):
         """Phase 1: Burst production to build inventory"""
-        tasks = []
-        for client in self.clients:
-            task = asyncio.create_task(self.client_burst_production(client, duration_minutes))
-            tasks.append(task)
+        loop = asyncio.get_running_loop()
+        # Every client stops on the same monotonic tick
+        deadline = loop.time() + duration_minutes * 60
         
-        # Also start message listeners
+        tasks = []
         for client in self.clients:
-            task = asyncio.create_task(client.listen_for_messages())
+            task = create_named_task(
+                loop, self.client_burst_production(client, deadline),
+                f"burst-production-{client.token}"
+            )
             tasks.append(task)
         
-        await asyncio.sleep(duration_minutes * 60)
-        
-        # Cancel tasks
-        for task in tasks:
-            task.cancel()
-        
         await asyncio.gather(*tasks, return_exceptions=True)
     
-    async def client_burst_production(self, client: TradingClient, duration_minutes: int):
-        """Individual client burst production"""
-        end_time = datetime.now() + timedelta(minutes=duration_minutes)
+    async def client_burst_production(self, client: TradingClient, deadline: float):
+        """Individual client burst production until the phase's loop-time deadline"""
+        loop = asyncio.get_running_loop()
         
-        while datetime.now() < end_time and client.running:
+        while loop.time() < deadline and client.running:
             try:
                 # Focus on basic products for production
-                product = random.choice(['FOSFO', 'PITA', 'PALTA-OIL'])
-                quantity = random.randint(10, 30)
+                product = client.PRODUCTS[int(client.next_uniform(0, 3))]
+                quantity = int(client.next_uniform(10, 31))
                 
-                await client.simulate_production(product, quantity)
-                await asyncio.sleep(random.uniform(5, 15))
+                client.simulate_production(product, quantity)
+                # Pauses are long; never sleep past the end of the phase
+                await asyncio.sleep(min(client.next_uniform(5, 15), deadline - loop.time()))
                 
             except Exception as e:
                 client.logger.error(f"Error in burst production: {e}")
@@ -401,52 +679,63 @@ class TradingSimulation:
     
     async def run_mixed_trading_phase(self, duration_minutes: int):
         """Phase 2: Mixed production and trading"""
+        loop = asyncio.get_running_loop()
+        # Every client stops on the same monotonic tick
+        deadline = loop.time() + duration_minutes * 60
+        
         tasks = []
         for client in self.clients:
-            task = asyncio.create_task(client.burst_trading_session(duration_minutes))
+            task = create_named_task(
+                loop, client.burst_trading_session(duration_minutes, deadline),
+                f"mixed-trading-{client.token}"
+            )
             tasks.append(task)
         
         await asyncio.gather(*tasks, return_exceptions=True)
     
     async def run_competitive_trading_phase(self, duration_minutes: int):
         """Phase 3: Competitive trading with aggressive pricing"""
-        end_time = datetime.now() + timedelta(minutes=duration_minutes)
+        loop = asyncio.get_running_loop()
+        # Every client stops on the same monotonic tick
+        deadline = loop.time() + duration_minutes * 60
         
         self.logger.info("Starting competitive trading phase - testing order priority")
         
         # Create competitive scenarios
         tasks = []
         for i, client in enumerate(self.clients):
-            task = asyncio.create_task(
-                self.competitive_client_trading(client, duration_minutes, i)
+            task = create_named_task(
+                loop, self.competitive_client_trading(client, deadline, i),
+                f"competitive-trading-{client.token}"
             )
             tasks.append(task)
         
         await asyncio.gather(*tasks, return_exceptions=True)
     
-    async def competitive_client_trading(self, client: TradingClient, duration_minutes: int, client_index: int):
-        """Individual client competitive trading"""
-        end_time = datetime.now() + timedelta(minutes=duration_minutes)
+    async def competitive_client_trading(self, client: TradingClient, deadline: float, client_index: int):
+        """Individual client competitive trading until the phase's loop-time deadline"""
+        loop = asyncio.get_running_loop()
         
-        while datetime.now() < end_time and client.running:
+        while loop.time() < deadline and client.running:
             try:
                 # Create competitive scenarios
-                product = random.choice(client.PRODUCTS)
-                quantity = random.randint(1, 5)
+                product_index = int(client.next_uniform(0, len(client.PRODUCTS)))
+                product = client.PRODUCTS[product_index]
+                quantity = int(client.next_uniform(1, 6))
                 
                 # Slightly different pricing strategies per client
-                base_price = client.generate_realistic_price(product)
+                base_price = client.generate_realistic_price(product_index)
                 
                 if client_index % 2 == 0:
                     # Aggressive buyer
-                    price = base_price * random.uniform(1.01, 1.05)
-                    await client.place_order("BUY", product, quantity, price)
+                    price = base_price * client.next_uniform(1.01, 1.05)
+                    client.place_order("BUY", product, quantity, price)
                 else:
                     # Aggressive seller
-                    price = base_price * random.uniform(0.95, 0.99)
-                    await client.place_order("SELL", product, quantity, price)
+                    price = base_price * client.next_uniform(0.95, 0.99)
+                    client.place_order("SELL", product, quantity, price)
                 
-                await asyncio.sleep(random.uniform(2, 8))
+                await asyncio.sleep(client.next_uniform(2, 8))
                 
             except Exception as e:
                 client.logger.error(f"Error in competitive trading: {e}")
@@ -456,9 +745,10 @@ class TradingSimulation:
         """Gracefully shutdown all clients"""
         self.logger.info("Shutting down all clients...")
         
+        loop = asyncio.get_running_loop()
         tasks = []
         for client in self.clients:
-            task = asyncio.create_task(client.disconnect())
+            task = create_named_task(loop, client.disconnect(), f"disconnect-{client.token}")
             tasks.append(task)
         
         await asyncio.gather(*tasks, return_exceptions=True)
@@ -470,18 +760,28 @@ class TradingSimulation:
         self.logger.info("TRADING SIMULATION FINAL REPORT")
         self.logger.info("="*60)
         
-        total_orders = sum(client.state.stats.total_orders for client in self.clients)
-        total_successful = sum(client.state.stats.successful_orders for client in self.clients)
-        total_failed = sum(client.state.stats.failed_orders for client in self.clients)
-        total_production = sum(client.state.production_count for client in self.clients)
-        total_fills = sum(client.state.orders_filled for client in self.clients)
-        
-        # Calculate average response times
-        all_response_times = []
-        for client in self.clients:
-            all_response_times.extend(client.state.stats.order_times)
-        
-        avg_response_time = statistics.mean(all_response_times) if all_response_times else 0
+        # One pass over the clients into per-client rows, then column reductions
+        counters = np.array([
+            (client.state.stats.total_orders, client.state.stats.successful_orders,
+             client.state.stats.failed_orders, client.state.production_count,
+             client.state.orders_filled, client.state.stats.response_count)
+            for client in self.clients
+        ], dtype=np.int64).reshape(-1, 6)
+        timings = np.array([
+            (client.state.stats.response_time_sum, client.state.stats.min_response_time,
+             client.state.stats.max_response_time)
+            for client in self.clients
+        ], dtype=np.float64).reshape(-1, 3)
+        inventories = np.array(
+            [client.state.inventory for client in self.clients], dtype=np.int64
+        ).reshape(-1, len(PRODUCTS))
+        
+        (total_orders, total_successful, total_failed,
+         total_production, total_fills, response_count) = counters.sum(axis=0).tolist()
+        
+        # Combine per-client running aggregates
+        response_time_sum = float(timings[:, 0].sum())
+        avg_response_time = response_time_sum / response_count if response_count else 0
         
         duration = self.end_time - self.start_time if self.end_time and self.start_time else timedelta(0)
         self.logger.info(f"Simulation Duration: {duration}")
@@ -491,11 +791,17 @@ class TradingSimulation:
         self.logger.info(f"Failed Orders: {total_failed} ({total_failed/total_orders*100:.1f}%)")
         self.logger.info(f"Total Productions: {total_production}")
         self.logger.info(f"Total Fills: {total_fills}")
+        self.logger.info("Total Inventory: " + ", ".join(
+            f"{product}={quantity}"
+            for product, quantity in zip(PRODUCTS, inventories.sum(axis=0).tolist())
+        ))
         self.logger.info(f"Average Response Time: {avg_response_time:.3f}s")
         
-        if all_response_times:
-            self.logger.info(f"Min Response Time: {min(all_response_times):.3f}s")
-            self.logger.info(f"Max Response Time: {max(all_response_times):.3f}s")
+        if response_count:
+            min_response_time = float(timings[:, 1].min())
+            max_response_time = float(timings[:, 2].max())
+            self.logger.info(f"Min Response Time: {min_response_time:.3f}s")
+            self.logger.info(f"Max Response Time: {max_response_time:.3f}s")
         
         self.logger.info("\nPER-CLIENT STATISTICS:")
         self.logger.info("-" * 40)
@@ -506,9 +812,8 @@ class TradingSimulation:
             self.logger.info(f"  Orders: {stats.successful_orders}/{stats.total_orders}")
             self.logger.info(f"  Productions: {client.state.production_count}")
             self.logger.info(f"  Fills: {client.state.orders_filled}")
-            if stats.order_times:
-                avg_time = statistics.mean(stats.order_times)
-                self.logger.info(f"  Avg Response: {avg_time:.3f}s")
+            if stats.response_count:
+                self.logger.info(f"  Avg Response: {stats.avg_response_time:.3f}s")
         
         self.logger.info("="*60)
 
@@ -523,11 +828,15 @@ async def main():
                        help='Simulation duration in minutes')
     parser.add_argument('--verbose', '-v', action='store_true',
                        help='Enable verbose logging')
+    parser.add_argument('--quiet', '-q', action='store_true',
+                       help='Only log warnings and errors')
     
     args = parser.parse_args()
     
     if args.verbose:
         logging.getLogger().setLevel(logging.DEBUG)
+    elif args.quiet:
+        logging.getLogger().setLevel(logging.WARNING)
     
     # Parse tokens
     tokens = [token.strip() for token in args.tokens.split(',')]
@@ -539,6 +848,9 @@ async def main():
     logger.info(f"Starting simulation with tokens: {tokens}")
     logger.info(f"Server: {args.server}")
     logger.info(f"Duration: {args.duration} minutes")
+    loop_type = type(asyncio.get_running_loop())
+    logger.info(f"Event loop: {loop_type.__module__}.{loop_type.__name__} "
+                f"(Python {sys.version_info.major}.{sys.version_info.minor})")
     
     # Create and run simulation
     simulation = TradingSimulation(tokens, args.server)
@@ -565,5 +877,13 @@ async def main():
         return 1
 
 if __name__ == "__main__":
+    # uvloop's libuv-based loop cuts per-frame overhead; without it (e.g. on
+    # Windows) the default asyncio loop is used
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+    
     exit_code = asyncio.run(main())
     sys.exit(exit_code)
\ No newline at end of file
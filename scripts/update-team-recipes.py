@@ -4,190 +4,133 @@ Update all team recipes in MongoDB to match the correct species recipes.
 This fixes the issue where teams don't have proper premium production recipes.
 """
 
-from pymongo import MongoClient
+from collections import defaultdict
+from pymongo import MongoClient, WriteConcern
+from pymongo.errors import ConnectionFailure
+import argparse
+import logging
 import sys
+import time
 
+logger = logging.getLogger(__name__)
+
+
+# Production bonus shared by every premium recipe
+PREMIUM_BONUS = 1.3
+
+
+def _premium(ingredients):
+    """Build a premium recipe sub-document from its ingredient amounts."""
+    return {
+        "type": "PREMIUM",
+        "ingredients": ingredients,
+        "premiumBonus": PREMIUM_BONUS,
+    }
+
+
+# Premium recipe sub-documents, defined once and shared by every species
+# that produces the same product from the same ingredients
+_TEMPLATES = {
+    "GUACA_from_FOSFO_PITA": _premium({"FOSFO": 5, "PITA": 3}),
+    "SEBO_from_NUCREM": _premium({"NUCREM": 8}),
+    "GUACA_from_PALTA-OIL_PITA": _premium({"PALTA-OIL": 5, "PITA": 3}),
+    "NUCREM_from_SEBO": _premium({"SEBO": 6}),
+    "CASCAR-ALLOY_from_FOSFO": _premium({"FOSFO": 10}),
+    "QUANTUM-PULP_from_PALTA-OIL": _premium({"PALTA-OIL": 7}),
+    "SKIN-WRAP_from_ASTRO-BUTTER": _premium({"ASTRO-BUTTER": 12}),
+    "FOSFO_from_SKIN-WRAP": _premium({"SKIN-WRAP": 9}),
+    "PITA_from_CASCAR-ALLOY": _premium({"CASCAR-ALLOY": 8}),
+    "ASTRO-BUTTER_from_GUACA": _premium({"GUACA": 10}),
+    "PALTA-OIL_from_QUANTUM-PULP": _premium({"QUANTUM-PULP": 7}),
+}
+
+# Shared BASIC recipe entry for each species' basic product
+_BASIC_RECIPE = {"type": "BASIC", "ingredients": {}, "premiumBonus": 1.0}
 
 # Recipe definitions matching the correct table
 RECIPES_BY_SPECIES = {
     "Avocultores": {
         "basic": "PALTA-OIL",
         "premium": {
-            "GUACA": {
-                "type": "PREMIUM",
-                "ingredients": {"FOSFO": 5, "PITA": 3},
-                "premiumBonus": 1.3,
-            },
-            "SEBO": {
-                "type": "PREMIUM",
-                "ingredients": {"NUCREM": 8},
-                "premiumBonus": 1.3,
-            },
+            "GUACA": _TEMPLATES["GUACA_from_FOSFO_PITA"],
+            "SEBO": _TEMPLATES["SEBO_from_NUCREM"],
         },
     },
     "Monjes de Fosforescencia": {
         "basic": "FOSFO",
         "premium": {
-            "GUACA": {
-                "type": "PREMIUM",
-                "ingredients": {"PALTA-OIL": 5, "PITA": 3},
-                "premiumBonus": 1.3,
-            },
-            "NUCREM": {
-                "type": "PREMIUM",
-                "ingredients": {"SEBO": 6},
-                "premiumBonus": 1.3,
-            },
+            "GUACA": _TEMPLATES["GUACA_from_PALTA-OIL_PITA"],
+            "NUCREM": _TEMPLATES["NUCREM_from_SEBO"],
         },
     },
     "Cosechadores de Pita": {
         "basic": "PITA",
         "premium": {
-            "SEBO": {
-                "type": "PREMIUM",
-                "ingredients": {"NUCREM": 8},
-                "premiumBonus": 1.3,
-            },
-            "CASCAR-ALLOY": {
-                "type": "PREMIUM",
-                "ingredients": {"FOSFO": 10},
-                "premiumBonus": 1.3,
-            },
+            "SEBO": _TEMPLATES["SEBO_from_NUCREM"],
+            "CASCAR-ALLOY": _TEMPLATES["CASCAR-ALLOY_from_FOSFO"],
         },
     },
     "Herreros Cósmicos": {
         "basic": "CASCAR-ALLOY",
         "premium": {
-            "QUANTUM-PULP": {
-                "type": "PREMIUM",
-                "ingredients": {"PALTA-OIL": 7},
-                "premiumBonus": 1.3,
-            },
-            "SKIN-WRAP": {
-                "type": "PREMIUM",
-                "ingredients": {"ASTRO-BUTTER": 12},
-                "premiumBonus": 1.3,
-            },
+            "QUANTUM-PULP": _TEMPLATES["QUANTUM-PULP_from_PALTA-OIL"],
+            "SKIN-WRAP": _TEMPLATES["SKIN-WRAP_from_ASTRO-BUTTER"],
         },
     },
     "Extractores": {
         "basic": "QUANTUM-PULP",
         "premium": {
-            "NUCREM": {
-                "type": "PREMIUM",
-                "ingredients": {"SEBO": 6},
-                "premiumBonus": 1.3,
-            },
-            "FOSFO": {
-                "type": "PREMIUM",
-                "ingredients": {"SKIN-WRAP": 9},
-                "premiumBonus": 1.3,
-            },
+            "NUCREM": _TEMPLATES["NUCREM_from_SEBO"],
+            "FOSFO": _TEMPLATES["FOSFO_from_SKIN-WRAP"],
         },
     },
     "Tejemanteles": {
         "basic": "SKIN-WRAP",
         "premium": {
-            "PITA": {
-                "type": "PREMIUM",
-                "ingredients": {"CASCAR-ALLOY": 8},
-                "premiumBonus": 1.3,
-            },
-            "ASTRO-BUTTER": {
-                "type": "PREMIUM",
-                "ingredients": {"GUACA": 10},
-                "premiumBonus": 1.3,
-            },
+            "PITA": _TEMPLATES["PITA_from_CASCAR-ALLOY"],
+            "ASTRO-BUTTER": _TEMPLATES["ASTRO-BUTTER_from_GUACA"],
         },
     },
     "Cremeros Astrales": {
         "basic": "ASTRO-BUTTER",
         "premium": {
-            "CASCAR-ALLOY": {
-                "type": "PREMIUM",
-                "ingredients": {"FOSFO": 10},
-                "premiumBonus": 1.3,
-            },
-            "PALTA-OIL": {
-                "type": "PREMIUM",
-                "ingredients": {"QUANTUM-PULP": 7},
-                "premiumBonus": 1.3,
-            },
+            "CASCAR-ALLOY": _TEMPLATES["CASCAR-ALLOY_from_FOSFO"],
+            "PALTA-OIL": _TEMPLATES["PALTA-OIL_from_QUANTUM-PULP"],
         },
     },
     "Mineros del Sebo": {
         "basic": "SEBO",
         "premium": {
-            "ASTRO-BUTTER": {
-                "type": "PREMIUM",
-                "ingredients": {"GUACA": 10},
-                "premiumBonus": 1.3,
-            },
-            "GUACA": {
-                "type": "PREMIUM",
-                "ingredients": {"PALTA-OIL": 5, "PITA": 3},
-                "premiumBonus": 1.3,
-            },
+            "ASTRO-BUTTER": _TEMPLATES["ASTRO-BUTTER_from_GUACA"],
+            "GUACA": _TEMPLATES["GUACA_from_PALTA-OIL_PITA"],
         },
     },
     "Núcleo Cremero": {
         "basic": "NUCREM",
         "premium": {
-            "SKIN-WRAP": {
-                "type": "PREMIUM",
-                "ingredients": {"ASTRO-BUTTER": 12},
-                "premiumBonus": 1.3,
-            },
-            "QUANTUM-PULP": {
-                "type": "PREMIUM",
-                "ingredients": {"PALTA-OIL": 7},
-                "premiumBonus": 1.3,
-            },
+            "SKIN-WRAP": _TEMPLATES["SKIN-WRAP_from_ASTRO-BUTTER"],
+            "QUANTUM-PULP": _TEMPLATES["QUANTUM-PULP_from_PALTA-OIL"],
         },
     },
     "Destiladores": {
         "basic": "GUACA",
         "premium": {
-            "PALTA-OIL": {
-                "type": "PREMIUM",
-                "ingredients": {"QUANTUM-PULP": 7},
-                "premiumBonus": 1.3,
-            },
-            "FOSFO": {
-                "type": "PREMIUM",
-                "ingredients": {"SKIN-WRAP": 9},
-                "premiumBonus": 1.3,
-            },
+            "PALTA-OIL": _TEMPLATES["PALTA-OIL_from_QUANTUM-PULP"],
+            "FOSFO": _TEMPLATES["FOSFO_from_SKIN-WRAP"],
         },
     },
     "Cartógrafos": {
         "basic": "GUACA",
         "premium": {
-            "NUCREM": {
-                "type": "PREMIUM",
-                "ingredients": {"SEBO": 6},
-                "premiumBonus": 1.3,
-            },
-            "PITA": {
-                "type": "PREMIUM",
-                "ingredients": {"CASCAR-ALLOY": 8},
-                "premiumBonus": 1.3,
-            },
+            "NUCREM": _TEMPLATES["NUCREM_from_SEBO"],
+            "PITA": _TEMPLATES["PITA_from_CASCAR-ALLOY"],
         },
     },
     "Someliers Andorianos": {
         "basic": "PALTA-OIL",
         "premium": {
-            "SEBO": {
-                "type": "PREMIUM",
-                "ingredients": {"NUCREM": 8},
-                "premiumBonus": 1.3,
-            },
-            "CASCAR-ALLOY": {
-                "type": "PREMIUM",
-                "ingredients": {"FOSFO": 10},
-                "premiumBonus": 1.3,
-            },
+            "SEBO": _TEMPLATES["SEBO_from_NUCREM"],
+            "CASCAR-ALLOY": _TEMPLATES["CASCAR-ALLOY_from_FOSFO"],
         },
     },
 }
@@ -204,7 +147,7 @@ def build_recipes_for_species(species):
 
     # Add basic recipe
     basic_product = species_data["basic"]
-    recipes[basic_product] = {"type": "BASIC", "ingredients": {}, "premiumBonus": 1.0}
+    recipes[basic_product] = _BASIC_RECIPE
 
     # Add premium recipes
     for product, recipe in species_data["premium"].items():
@@ -213,63 +156,191 @@ def build_recipes_for_species(species):
     return recipes
 
 
+# Recipe maps are static, so each species' map is built once at import and
+# shared by every team of that species
+PRECOMPUTED_RECIPES = {
+    species: build_recipes_for_species(species) for species in RECIPES_BY_SPECIES
+}
+
+# Basic and premium product names per species, for the per-team report
+RECIPE_PRODUCTS = {
+    species: (
+        [k for k, v in recipes.items() if v["type"] == "BASIC"],
+        [k for k, v in recipes.items() if v["type"] == "PREMIUM"],
+    )
+    for species, recipes in PRECOMPUTED_RECIPES.items()
+}
+
+
+def same_document(stored, expected):
+    """Compare like MongoDB's $eq: embedded documents must also match in key order.
+
+    Python's == ignores key order, so a team whose recipes only differ in
+    order would look unchanged to the scan yet still match the update's $ne.
+    """
+    if isinstance(stored, dict) and isinstance(expected, dict):
+        return list(stored) == list(expected) and all(
+            same_document(stored[key], value) for key, value in expected.items()
+        )
+    if isinstance(stored, list) and isinstance(expected, list):
+        return len(stored) == len(expected) and all(
+            same_document(s, e) for s, e in zip(stored, expected)
+        )
+    return stored == expected
+
+
+def build_recipe_update(species_list):
+    """Build one pipeline update that sets the correct recipes for species_list.
+
+    The filter only matches teams of those species whose recipes differ (each
+    $or branch can use the species index); $switch then picks the recipe map
+    for each matched team's species. $ne is order-sensitive, so teams whose
+    recipes only differ in key order are rewritten in the canonical order,
+    matching what same_document reports in the scan. $literal stops the
+    recipe maps from being parsed as aggregation expressions.
+    """
+    update_filter = {
+        "$or": [
+            {"species": species, "recipes": {"$ne": PRECOMPUTED_RECIPES[species]}}
+            for species in species_list
+        ]
+    }
+    pipeline = [
+        {
+            "$set": {
+                "recipes": {
+                    "$switch": {
+                        "branches": [
+                            {
+                                "case": {"$eq": ["$species", species]},
+                                "then": {"$literal": PRECOMPUTED_RECIPES[species]},
+                            }
+                            for species in species_list
+                        ],
+                        "default": "$recipes",
+                    }
+                }
+            }
+        }
+    ]
+    return update_filter, pipeline
+
+
 def main():
+    parser = argparse.ArgumentParser(
+        description="Update all team recipes to match their species recipes"
+    )
+    parser.add_argument(
+        "--verbose", "-v", action="store_true", help="Report every team processed"
+    )
+    args = parser.parse_args()
+
+    # Per-team details are DEBUG so large runs don't spend their time on
+    # terminal output; stdout keeps them in order with the prints below
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format="%(message)s",
+        stream=sys.stdout,
+    )
+
     # Connect to MongoDB
     print("🔌 Connecting to MongoDB...")
+    # The script holds one connection at a time, so size the pool for that
+    # instead of the driver default of 100 sockets
     client = MongoClient(
-        "mongodb://localhost:27017,localhost:27018,localhost:27019/?replicaSet=rs0"
+        "mongodb://localhost:27017,localhost:27018,localhost:27019/?replicaSet=rs0",
+        maxPoolSize=4,
+        minPoolSize=1,
+        serverSelectionTimeoutMS=5000,
+        appname="update-team-recipes",
     )
+
+    # Resolve the replica set primary once, before any reads or writes
+    try:
+        client.admin.command("ping")
+    except ConnectionFailure as e:
+        print(f"❌ Failed to connect to MongoDB: {e}")
+        sys.exit(1)
+    print("✅ Connected successfully!")
+
     db = client["avocado_exchange"]
     teams_collection = db["teams"]
+    # The update is idempotent, so writes only wait for the primary's ack.
+    # A failover before the journal flush could lose them; rerunning the
+    # script restores the same state.
+    teams_writes = db.get_collection(
+        "teams", write_concern=WriteConcern(w=1, j=False)
+    )
 
-    # Get all teams
-    teams = list(teams_collection.find({}))
-    print(f"📊 Found {len(teams)} teams")
+    # The recipe update filters on species; create_index is a no-op
+    # when the index already exists
+    teams_collection.create_index([("species", 1)], name="species_1")
 
+    # Stream all teams, fetching only the fields the update needs, so memory
+    # stays bounded by the cursor batch instead of the collection size
+    teams = teams_collection.find(
+        {},
+        projection={"_id": 0, "teamName": 1, "species": 1, "recipes": 1},
+    ).batch_size(500)
+    print("📊 Scanning teams...")
+
+    team_count = 0
     updated_count = 0
     error_count = 0
+    # Number of teams needing an update, per species: every team of a species
+    # gets the same recipes, so the update only needs the species
+    outdated_by_species = defaultdict(int)
 
     for team in teams:
+        team_count += 1
         team_name = team.get("teamName", "Unknown")
         species = team.get("species", "Unknown")
 
-        print(f"\n🔄 Processing {team_name} ({species})...")
+        logger.debug("\n🔄 Processing %s (%s)...", team_name, species)
 
-        # Build correct recipes for this species
-        correct_recipes = build_recipes_for_species(species)
+        # Look up the correct recipes for this species
+        correct_recipes = PRECOMPUTED_RECIPES.get(species)
 
         if not correct_recipes:
-            print(f"   ⚠️  Skipping {team_name} - unknown species")
+            logger.warning("   ⚠️  Skipping %s - unknown species", team_name)
             error_count += 1
             continue
 
-        # Update the team's recipes
+        # Teams that already have the right recipes need no write at all
+        if same_document(team.get("recipes"), correct_recipes):
+            logger.debug("   ℹ️  No changes needed for %s", team_name)
+            continue
+
+        # Queue the team under its species' update
+        outdated_by_species[species] += 1
+        if logger.isEnabledFor(logging.DEBUG):
+            basic_products, premium_products = RECIPE_PRODUCTS[species]
+            logger.debug("   📝 Queued recipe update for %s", team_name)
+            logger.debug("      Basic: %s", basic_products)
+            logger.debug("      Premium: %s", premium_products)
+
+    print(f"📊 Found {team_count} teams")
+
+    # Fix every outdated species with a single server-side pipeline update
+    outdated_species = list(outdated_by_species)
+    if outdated_species:
+        print(f"\n🚀 Writing recipe updates for {len(outdated_species)} species...")
+        update_filter, pipeline = build_recipe_update(outdated_species)
+        started = time.perf_counter()
         try:
-            result = teams_collection.update_one(
-                {"_id": team["_id"]}, {"$set": {"recipes": correct_recipes}}
-            )
-
-            if result.modified_count > 0:
-                print(f"   ✅ Updated recipes for {team_name}")
-                print(
-                    f"      Basic: {[k for k, v in correct_recipes.items() if v['type'] == 'BASIC']}"
-                )
-                print(
-                    f"      Premium: {[k for k, v in correct_recipes.items() if v['type'] == 'PREMIUM']}"
-                )
-                updated_count += 1
-            else:
-                print(f"   ℹ️  No changes needed for {team_name}")
+            result = teams_writes.update_many(update_filter, pipeline)
+            updated_count = result.modified_count
         except Exception as e:
-            print(f"   ❌ Error updating {team_name}: {e}")
-            error_count += 1
+            print(f"   ❌ Error writing recipe updates: {e}")
+            error_count += sum(outdated_by_species.values())
+        print(f"   ⏱️  Update took {time.perf_counter() - started:.3f}s")
 
     print(f"\n{'=' * 60}")
     print(f"📈 Summary:")
-    print(f"   Total teams: {len(teams)}")
+    print(f"   Total teams: {team_count}")
     print(f"   Updated: {updated_count}")
     print(f"   Errors: {error_count}")
-    print(f"   Unchanged: {len(teams) - updated_count - error_count}")
+    print(f"   Unchanged: {team_count - updated_count - error_count}")
     print(f"{'=' * 60}")
 
     if error_count == 0: